@@ -1,92 +1,243 @@
-import json
-from typing import Any, Dict
+import asyncio
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-import requests
-from fastapi import APIRouter, HTTPException, Path
+import httpx
+import orjson
+from fastapi import APIRouter, Path, Query, Request, Response
 from fastapi.params import Depends
+from fastapi.responses import ORJSONResponse
 
-from app.models import StatsResponse
+from app.cache import TTLCache
+from app.loader import BatchLoader
+from app.models import StatsError, StatsSuccess
+
+CACHE_TTL = 120
+
+MAX_BATCH_SIZE = 25
+
+_USERNAME_RE = re.compile(r"[A-Za-z0-9_-]{1,30}")
+
+_USER_FIELDS = """
+    contributions { points }
+    profile { reputation ranking }
+    submitStats {
+        acSubmissionNum { difficulty count submissions }
+        totalSubmissionNum { difficulty submissions }
+    }
+"""
+
+
+@lru_cache(maxsize=MAX_BATCH_SIZE)
+def _batch_query(size: int) -> bytes:
+    params = ", ".join(f"$u{i}: String!, $c{i}: Boolean!" for i in range(size))
+    users = " ".join(
+        f"u{i}: matchedUser(username: $u{i}) {{ {_USER_FIELDS} "
+        f"submissionCalendar @include(if: $c{i}) }}"
+        for i in range(size)
+    )
+    query = (
+        f"query getUserProfiles({params}) "
+        f"{{ allQuestionsCount {{ difficulty count }} {users} }}"
+    )
+    return orjson.dumps(" ".join(query.split()))
+
+
+StatsResult = Union[StatsSuccess, StatsError]
+EncodedStats = Union[bytes, StatsError]
+
+_CACHE_HEADERS = {"Cache-Control": f"max-age={CACHE_TTL}"}
 
 router = APIRouter()
 
 
 class StatsService:
     GRAPHQL_URL = "https://leetcode.com/graphql/"
+    HEADERS = {"Content-Type": "application/json", "Accept-Encoding": "gzip, deflate"}
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self._cache: TTLCache[bytes] = TTLCache(maxsize=10_000, ttl=CACHE_TTL)
+        self._inflight: Dict[Tuple[str, bool], "asyncio.Future[EncodedStats]"] = {}
+        self._loader: BatchLoader[Tuple[str, bool], EncodedStats] = BatchLoader(
+            self._fetch_stats, max_batch_size=MAX_BATCH_SIZE, wait_interval=0.005
+        )
+
+    async def get_stats(self, username: str, calendar: bool = True) -> EncodedStats:
+        key = (username, calendar)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._loader.load(key)
+            future.add_done_callback(lambda f: self._settle(key, f))
+            self._inflight[key] = future
+        return await asyncio.shield(future)
+
+    def _settle(
+        self, key: Tuple[str, bool], future: "asyncio.Future[EncodedStats]"
+    ) -> None:
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
 
-    def __init__(self):
-        self.headers = {"Content-Type": "application/json"}
+        stats = future.result()
+        if isinstance(stats, bytes):
+            self._cache.set(key, stats)
 
-    def get_stats(self, username: str) -> StatsResponse:
-        query = self._build_query(username)
+    async def _fetch_stats(self, keys: List[Tuple[str, bool]]) -> List[EncodedStats]:
+        payload = self._build_query(keys)
         try:
-            response = requests.post(self.GRAPHQL_URL, headers=self.headers, json=query)
+            response = await self.client.post(self.GRAPHQL_URL, content=payload)
             response.raise_for_status()
-            return self._process_response(response.json())
-        except requests.RequestException as e:
-            return StatsResponse.error(f"Request failed: {str(e)}")
-        except json.JSONDecodeError:
-            return StatsResponse.error("Failed to decode JSON response")
+            body = orjson.loads(response.content)
+        except httpx.TimeoutException:
+            error = StatsError(message="Request timed out", status_code=504)
+            return [error] * len(keys)
+        except httpx.HTTPError as e:
+            error = StatsError(message=f"Request failed: {str(e)}", status_code=502)
+            return [error] * len(keys)
+        except orjson.JSONDecodeError:
+            error = StatsError(
+                message="Failed to decode JSON response", status_code=502
+            )
+            return [error] * len(keys)
         except Exception as e:
-            return StatsResponse.error(f"An unexpected error occurred: {str(e)}")
-
-    def _build_query(self, username: str) -> Dict[str, Any]:
-        return {
-            "query": """
-                query getUserProfile($username: String!) {
-                    allQuestionsCount { difficulty count }
-                    matchedUser(username: $username) {
-                        contributions { points }
-                        profile { reputation ranking }
-                        submissionCalendar
-                        submitStats {
-                            acSubmissionNum { difficulty count submissions }
-                            totalSubmissionNum { difficulty count submissions }
-                        }
-                    }
-                }
-            """,
-            "variables": {"username": username},
-        }
-
-    def _process_response(self, response_data: Dict[str, Any]) -> StatsResponse:
-        try:
-            data = response_data.get("data", {})
-            all_questions = data.get("allQuestionsCount", [])
-            matched_user = data.get("matchedUser", {})
-            submit_stats = matched_user.get("submitStats", {})
-            actual_submissions = submit_stats.get("acSubmissionNum", [])
-            total_submissions = submit_stats.get("totalSubmissionNum", [])
-
-            total_questions = self._sum_question_counts(all_questions)
-            total_easy = self._get_question_count(all_questions, "Easy")
-            total_medium = self._get_question_count(all_questions, "Medium")
-            total_hard = self._get_question_count(all_questions, "Hard")
-
-            easy_solved = self._get_submission_count(actual_submissions, "Easy")
-            medium_solved = self._get_submission_count(actual_submissions, "Medium")
-            hard_solved = self._get_submission_count(actual_submissions, "Hard")
-            total_solved = easy_solved + medium_solved + hard_solved
+            error = StatsError(message=f"An unexpected error occurred: {str(e)}")
+            return [error] * len(keys)
 
-            total_accept_count = self._get_submission_stat(
-                actual_submissions, "Easy", "submissions"
+        if not isinstance(body, dict):
+            error = StatsError(
+                message="Failed to decode JSON response", status_code=502
             )
-            total_sub_count = self._get_submission_stat(
-                total_submissions, "Easy", "submissions"
+            return [error] * len(keys)
+
+        data, errors = body.get("data"), body.get("errors")
+        if not isinstance(data, dict):
+            error = StatsError(
+                message=f"Upstream error: {self._format_errors(errors)}",
+                status_code=502,
             )
+            return [error] * len(keys)
+
+        all_questions = data.get("allQuestionsCount")
+        if not isinstance(all_questions, list) or not all_questions:
+            reason = (
+                self._format_errors(errors) if errors else "missing allQuestionsCount"
+            )
+            error = StatsError(message=f"Upstream error: {reason}", status_code=502)
+            return [error] * len(keys)
+
+        alias_errors = self._errors_by_alias(errors)
+        results: List[EncodedStats] = []
+        for i, (_, calendar) in enumerate(keys):
+            alias = f"u{i}"
+            matched_user = data.get(alias)
+            if matched_user is None and alias in alias_errors:
+                results.append(self._alias_error(alias_errors[alias]))
+            else:
+                stats = self._process_response(all_questions, matched_user, calendar)
+                results.append(self._encode(stats))
+        return results
+
+    def _errors_by_alias(self, errors: Any) -> Dict[str, List[str]]:
+        by_alias: Dict[str, List[str]] = {}
+        for error in errors or []:
+            if not isinstance(error, dict):
+                continue
+            path = error.get("path")
+            if isinstance(path, list) and path and isinstance(path[0], str):
+                message = str(error.get("message", error))
+                by_alias.setdefault(path[0], []).append(message)
+        return by_alias
+
+    def _alias_error(self, messages: List[str]) -> StatsError:
+        if all("does not exist" in message.lower() for message in messages):
+            return StatsError(message="User not found", status_code=404)
+        return StatsError(
+            message=f"Upstream error: {'; '.join(messages)}", status_code=502
+        )
+
+    def _format_errors(self, errors: Any) -> str:
+        if not errors:
+            return "no data returned"
+        return "; ".join(
+            str(error.get("message", error)) if isinstance(error, dict) else str(error)
+            for error in errors
+        )
+
+    def _encode(self, stats: StatsResult) -> EncodedStats:
+        if isinstance(stats, StatsSuccess):
+            return orjson.dumps(stats.model_dump())
+        return stats
+
+    def _build_query(self, keys: List[Tuple[str, bool]]) -> bytes:
+        variables: Dict[str, Any] = {}
+        for i, (username, calendar) in enumerate(keys):
+            variables[f"u{i}"] = username
+            variables[f"c{i}"] = calendar
+        return (
+            b'{"query":'
+            + _batch_query(len(keys))
+            + b',"variables":'
+            + orjson.dumps(variables)
+            + b"}"
+        )
+
+    def _process_response(
+        self,
+        all_questions: List[Dict[str, Any]],
+        matched_user: Optional[Dict[str, Any]],
+        calendar: bool,
+    ) -> StatsResult:
+        if matched_user is None:
+            return StatsError(message="User not found", status_code=404)
+
+        try:
+            submit_stats = matched_user.get("submitStats") or {}
+            actual_submissions = submit_stats.get("acSubmissionNum") or []
+            total_submissions = submit_stats.get("totalSubmissionNum") or []
+
+            question_counts = {
+                q.get("difficulty"): q.get("count", 0) for q in all_questions if q
+            }
+            accepted = {sub.get("difficulty"): sub for sub in actual_submissions if sub}
+            submitted = {sub.get("difficulty"): sub for sub in total_submissions if sub}
+
+            total_questions = sum(question_counts.values())
+            total_easy = question_counts.get("Easy", 0)
+            total_medium = question_counts.get("Medium", 0)
+            total_hard = question_counts.get("Hard", 0)
+
+            easy_solved = accepted.get("Easy", {}).get("count", 0)
+            medium_solved = accepted.get("Medium", {}).get("count", 0)
+            hard_solved = accepted.get("Hard", {}).get("count", 0)
+            total_solved = easy_solved + medium_solved + hard_solved
+
+            total_accept_count = accepted.get("Easy", {}).get("submissions", 0)
+            total_sub_count = submitted.get("Easy", {}).get("submissions", 0)
             acceptance_rate = self._calculate_acceptance_rate(
                 total_accept_count, total_sub_count
             )
 
-            contribution_points = matched_user.get("contributions", {}).get("points", 0)
-            reputation = matched_user.get("profile", {}).get("reputation", 0)
-            ranking = matched_user.get("profile", {}).get("ranking", 0)
+            contributions = matched_user.get("contributions") or {}
+            profile = matched_user.get("profile") or {}
+            contribution_points = contributions.get("points", 0)
+            reputation = profile.get("reputation", 0)
+            ranking = profile.get("ranking", 0)
 
-            submission_calendar = self._parse_submission_calendar(
-                matched_user.get("submissionCalendar", "{}")
+            submission_calendar = (
+                self._parse_submission_calendar(
+                    matched_user.get("submissionCalendar") or "{}"
+                )
+                if calendar
+                else None
             )
 
-            return StatsResponse.success(
-                "retrieved",
+            return StatsSuccess(
                 total_solved=total_solved,
                 total_questions=total_questions,
                 easy_solved=easy_solved,
@@ -102,43 +253,15 @@ class StatsService:
                 submission_calendar=submission_calendar,
             )
         except KeyError as e:
-            return StatsResponse.error(f"Missing key in response: {str(e)}")
+            return StatsError(
+                message=f"Missing key in response: {str(e)}", status_code=502
+            )
         except (TypeError, ValueError) as e:
-            return StatsResponse.error(f"Data processing error: {str(e)}")
-
-    def _sum_question_counts(self, questions: list) -> int:
-        return sum(q.get("count", 0) for q in questions)
-
-    def _sum_submission_counts(self, submissions: list) -> int:
-        return sum(sub.get("count", 0) for sub in submissions)
-
-    def _get_question_count(self, questions: list, difficulty: str) -> int:
-        return next(
-            (q.get("count", 0) for q in questions if q.get("difficulty") == difficulty),
-            0,
-        )
-
-    def _get_submission_count(self, submissions: list, difficulty: str) -> int:
-        return next(
-            (
-                sub.get("count", 0)
-                for sub in submissions
-                if sub.get("difficulty") == difficulty
-            ),
-            0,
-        )
-
-    def _get_submission_stat(
-        self, submissions: list, difficulty: str, stat: str
-    ) -> int:
-        return next(
-            (
-                sub.get(stat, 0)
-                for sub in submissions
-                if sub.get("difficulty") == difficulty
-            ),
-            0,
-        )
+            return StatsError(
+                message=f"Data processing error: {str(e)}", status_code=502
+            )
+        except Exception as e:
+            return StatsError(message=f"An unexpected error occurred: {str(e)}")
 
     def _calculate_acceptance_rate(self, accept_count: int, total_count: int) -> float:
         return (
@@ -149,9 +272,8 @@ class StatsService:
 
     def _parse_submission_calendar(self, calendar_str: str) -> Dict[str, int]:
         try:
-            calendar = json.loads(calendar_str)
-            return dict(sorted(calendar.items()))
-        except json.JSONDecodeError:
+            return orjson.loads(calendar_str)
+        except orjson.JSONDecodeError:
             return {}
 
     @staticmethod
@@ -159,19 +281,39 @@ class StatsService:
         return round(value, decimal_place)
 
 
-@router.get("/{username}")
-def get_statistic(
+async def get_stats_service(request: Request) -> StatsService:
+    return request.app.state.stats_service
+
+
+@router.get(
+    "/{username}",
+    response_model=StatsSuccess,
+    responses={
+        400: {"model": StatsError},
+        404: {"model": StatsError},
+        500: {"model": StatsError},
+        502: {"model": StatsError},
+        504: {"model": StatsError},
+    },
+)
+async def get_statistic(
     username: str = Path(
         ..., description="The username of the user whose statistics are to be retrieved"
     ),
-    stats_service: StatsService = Depends(StatsService),
+    calendar: bool = Query(
+        True, description="Whether to include the daily submission calendar"
+    ),
+    stats_service: StatsService = Depends(get_stats_service),
 ):
-    if not username:
-        raise HTTPException(status_code=400, detail="Username parameter is required")
+    if not _USERNAME_RE.fullmatch(username):
+        error = StatsError(message="Invalid username", status_code=400)
+        return ORJSONResponse(status_code=error.status_code, content=error.model_dump())
 
-    stats = stats_service.get_stats(username)
+    stats = await stats_service.get_stats(username, calendar)
 
-    if stats.status == "success":
-        return stats
-    else:
-        raise HTTPException(status_code=500, detail=stats.message)
+    if isinstance(stats, StatsError):
+        return ORJSONResponse(status_code=stats.status_code, content=stats.model_dump())
+
+    return Response(
+        content=stats, media_type="application/json", headers=_CACHE_HEADERS
+    )
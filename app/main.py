@@ -1,39 +1,66 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+import httpx
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
+from app.endpoints import StatsService
 from app.endpoints import router as statistic_router
+from app.settings import get_settings
+
+_NOT_FOUND_BODY = orjson.dumps({"message": "Resource not found"})
+_SERVER_ERROR_BODY = orjson.dumps({"message": "Internal server error"})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        timeout=10.0,
+        limits=httpx.Limits(
+            max_connections=100, max_keepalive_connections=50, keepalive_expiry=75
+        ),
+        headers=StatsService.HEADERS,
+    )
+    app.state.stats_service = StatsService(app.state.http)
+    yield
+    await app.state.http.aclose()
+
 
 app = FastAPI(
     title="LeetcodeStats",
     description="Simple Python API for Leetcode statistics",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+cors_origins = get_settings().cors_origin_list
+if cors_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=cors_origins,
+        allow_methods=["GET"],
+        allow_headers=["*"],
+        max_age=86400,
+    )
 
 app.include_router(statistic_router, prefix="/api/v1/statistic", tags=["Statistic"])
 
 
 @app.exception_handler(404)
 async def custom_404_handler(request, exc):
-    return JSONResponse(
-        status_code=404,
-        content={"message": "Resource not found"},
+    return Response(
+        content=_NOT_FOUND_BODY, status_code=404, media_type="application/json"
     )
 
 
 @app.exception_handler(500)
 async def custom_500_handler(request, exc):
-    return JSONResponse(
-        status_code=500,
-        content={"message": "Internal server error"},
+    return Response(
+        content=_SERVER_ERROR_BODY, status_code=500, media_type="application/json"
     )
 
 
@@ -1,16 +1,25 @@
-from typing import Any
+from typing import Dict, Optional
 
+from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 
-class StatsResponse:
-    def __init__(self, status: str, message: str, **kwargs: Any):
-        self.status = status
-        self.message = message
-        self.data = kwargs
 
-    @classmethod
-    def error(cls, message: str) -> "StatsResponse":
-        return cls(status="error", message=message)
+class StatsSuccess(BaseModel):
+    total_solved: int
+    total_questions: int
+    easy_solved: int
+    total_easy: int
+    medium_solved: int
+    total_medium: int
+    hard_solved: int
+    total_hard: int
+    acceptance_rate: float
+    ranking: int
+    contribution_points: int
+    reputation: int
+    submission_calendar: Optional[Dict[str, int]] = None
 
-    @classmethod
-    def success(cls, message: str, **kwargs: Any) -> "StatsResponse":
-        return cls(status="success", message=message, **kwargs)
+
+class StatsError(BaseModel):
+    message: str
+    status_code: SkipJsonSchema[int] = Field(default=500, exclude=True)
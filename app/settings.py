@@ -1,12 +1,29 @@
 import os
+from functools import lru_cache
+from typing import List
 
-from dotenv import load_dotenv
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-load_dotenv()
 
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in {"1", "true", "yes", "on"}
 
-class Settings:
-    DATABASE_URL: str = os.environ.get("DATABASE_URL", "")
 
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file=".env" if _env_flag("LOAD_DOTENV") else None, extra="ignore"
+    )
 
-settings = Settings()
+    database_url: str = ""
+    cors_origins: str = ""
+
+    @property
+    def cors_origin_list(self) -> List[str]:
+        return [
+            origin.strip() for origin in self.cors_origins.split(",") if origin.strip()
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
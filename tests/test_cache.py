@@ -0,0 +1,28 @@
+from app import cache
+from app.cache import TTLCache
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    ttl_cache: TTLCache[str] = TTLCache(maxsize=10, ttl=5)
+
+    ttl_cache.set("alice", "stats")
+    now[0] += 4
+    assert ttl_cache.get("alice") == "stats"
+
+    now[0] += 1
+    assert ttl_cache.get("alice") is None
+
+
+def test_evicts_least_recently_used_entry():
+    ttl_cache: TTLCache[int] = TTLCache(maxsize=2, ttl=60)
+
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("c") == 3
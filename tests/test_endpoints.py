@@ -0,0 +1,280 @@
+import asyncio
+from typing import Any, Callable, Dict
+
+import httpx
+import orjson
+from fastapi.testclient import TestClient
+
+from app.endpoints import StatsService, get_stats_service
+from app.main import app
+from app.models import StatsError
+
+ALL_QUESTIONS = [
+    {"difficulty": "All", "count": 6},
+    {"difficulty": "Easy", "count": 3},
+    {"difficulty": "Medium", "count": 2},
+    {"difficulty": "Hard", "count": 1},
+]
+
+
+def make_user(**overrides: Any) -> Dict[str, Any]:
+    user = {
+        "contributions": {"points": 10},
+        "profile": {"reputation": 2, "ranking": 1000},
+        "submissionCalendar": '{"1700000000": 3}',
+        "submitStats": {
+            "acSubmissionNum": [
+                {"difficulty": "Easy", "count": 2, "submissions": 4},
+                {"difficulty": "Medium", "count": 1, "submissions": 1},
+                {"difficulty": "Hard", "count": 0, "submissions": 0},
+            ],
+            "totalSubmissionNum": [{"difficulty": "Easy", "submissions": 8}],
+        },
+    }
+    user.update(overrides)
+    return user
+
+
+def graphql_handler(
+    users: Dict[str, Any], calls: list
+) -> Callable[[httpx.Request], httpx.Response]:
+    def handler(request: httpx.Request) -> httpx.Response:
+        variables = orjson.loads(request.content)["variables"]
+        aliases = sorted(k for k in variables if k.startswith("u"))
+        calls.append([variables[alias] for alias in aliases])
+        data: Dict[str, Any] = {"allQuestionsCount": ALL_QUESTIONS}
+        for alias in aliases:
+            user = users.get(variables[alias])
+            if user is not None and not variables[f"c{alias[1:]}"]:
+                user = {k: v for k, v in user.items() if k != "submissionCalendar"}
+            data[alias] = user
+        return httpx.Response(200, content=orjson.dumps({"data": data}))
+
+    return handler
+
+
+def make_service(handler: Callable[[httpx.Request], httpx.Response]) -> StatsService:
+    return StatsService(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+
+def test_batch_with_malformed_user_only_fails_that_user():
+    calls: list = []
+    users = {
+        "good1": make_user(),
+        "good2": make_user(profile=None, contributions=None),
+        "bad": make_user(
+            submitStats={"acSubmissionNum": [{"difficulty": "Easy", "count": None}]}
+        ),
+    }
+    service = make_service(graphql_handler(users, calls))
+
+    async def run():
+        return await asyncio.gather(
+            service.get_stats("good1"),
+            service.get_stats("good2"),
+            service.get_stats("bad"),
+        )
+
+    good1, good2, bad = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert orjson.loads(good1)["total_solved"] == 3
+    assert orjson.loads(good1)["acceptance_rate"] == 50.0
+    assert orjson.loads(good2)["ranking"] == 0
+    assert isinstance(bad, StatsError)
+
+
+def test_graphql_errors_without_data_are_reported_for_every_key():
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = {"errors": [{"message": "Too many requests"}], "data": None}
+        return httpx.Response(200, content=orjson.dumps(body))
+
+    service = make_service(handler)
+
+    async def run():
+        return await asyncio.gather(
+            service.get_stats("alice"), service.get_stats("bob")
+        )
+
+    for stats in asyncio.run(run()):
+        assert isinstance(stats, StatsError)
+        assert stats.message == "Upstream error: Too many requests"
+
+
+def test_route_maps_errors_to_status_codes():
+    def handler(request: httpx.Request) -> httpx.Response:
+        variables = orjson.loads(request.content)["variables"]
+        if variables["u0"] == "slow":
+            raise httpx.ReadTimeout("timed out", request=request)
+        data = {"allQuestionsCount": ALL_QUESTIONS, "u0": None}
+        return httpx.Response(200, content=orjson.dumps({"data": data}))
+
+    service = make_service(handler)
+    app.dependency_overrides[get_stats_service] = lambda: service
+    try:
+        client = TestClient(app)
+        missing = client.get("/api/v1/statistic/nobody")
+        slow = client.get("/api/v1/statistic/slow")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert missing.status_code == 404
+    assert missing.json() == {"message": "User not found"}
+    assert slow.status_code == 504
+
+
+def test_concurrent_waiters_share_one_upstream_call():
+    calls: list = []
+    service = make_service(graphql_handler({"alice": make_user()}, calls))
+
+    async def run():
+        return await asyncio.gather(*(service.get_stats("alice") for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert calls == [["alice"]]
+    assert len(set(results)) == 1
+
+
+def test_cache_is_filled_when_first_caller_is_cancelled():
+    calls: list = []
+    inner = graphql_handler({"alice": make_user()}, calls)
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await release.wait()
+        return inner(request)
+
+    service = make_service(handler)
+
+    async def run():
+        first = asyncio.create_task(service.get_stats("alice"))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        release.set()
+        await asyncio.sleep(0.02)
+        return first, await service.get_stats("alice")
+
+    first, stats = asyncio.run(run())
+
+    assert first.cancelled()
+    assert isinstance(stats, bytes)
+    assert calls == [["alice"]]
+
+
+def test_errors_are_not_cached():
+    calls: list = []
+    users: Dict[str, Any] = {}
+    service = make_service(graphql_handler(users, calls))
+
+    async def run():
+        missing = await service.get_stats("alice")
+        users["alice"] = make_user()
+        return missing, await service.get_stats("alice")
+
+    missing, found = asyncio.run(run())
+
+    assert isinstance(missing, StatsError)
+    assert isinstance(found, bytes)
+    assert calls == [["alice"], ["alice"]]
+
+
+def test_alias_errors_are_reported_per_user():
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = {
+            "data": {
+                "allQuestionsCount": ALL_QUESTIONS,
+                "u0": make_user(),
+                "u1": None,
+                "u2": None,
+                "u3": None,
+            },
+            "errors": [
+                {"message": "Too many requests", "path": ["u1"]},
+                {"message": "That user does not exist.", "path": ["u2"]},
+            ],
+        }
+        return httpx.Response(200, content=orjson.dumps(body))
+
+    service = make_service(handler)
+
+    async def run():
+        return await asyncio.gather(
+            *(service.get_stats(name) for name in ("ok", "limited", "gone", "none"))
+        )
+
+    ok, limited, gone, none = asyncio.run(run())
+
+    assert isinstance(ok, bytes)
+    assert limited.status_code == 502
+    assert limited.message == "Upstream error: Too many requests"
+    assert gone.status_code == 404
+    assert none.status_code == 404
+
+
+def test_non_object_body_is_an_upstream_error():
+    service = make_service(lambda request: httpx.Response(200, content=b"[1,2]"))
+
+    stats = asyncio.run(service.get_stats("alice"))
+
+    assert isinstance(stats, StatsError)
+    assert stats.status_code == 502
+    assert stats.message == "Failed to decode JSON response"
+
+
+def test_missing_question_counts_fail_the_batch_and_are_not_cached():
+    calls: list = []
+    inner = graphql_handler({"alice": make_user()}, calls)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        response = inner(request)
+        body = orjson.loads(response.content)
+        body["data"]["allQuestionsCount"] = None
+        return httpx.Response(200, content=orjson.dumps(body))
+
+    service = make_service(handler)
+
+    async def run():
+        first = await service.get_stats("alice")
+        return first, await service.get_stats("alice")
+
+    first, second = asyncio.run(run())
+
+    assert isinstance(first, StatsError)
+    assert first.status_code == 502
+    assert first.message == "Upstream error: missing allQuestionsCount"
+    assert isinstance(second, StatsError)
+    assert len(calls) == 2
+
+
+def test_route_rejects_invalid_username_without_upstream_call():
+    calls: list = []
+    service = make_service(graphql_handler({}, calls))
+    app.dependency_overrides[get_stats_service] = lambda: service
+    try:
+        response = TestClient(app).get("/api/v1/statistic/bad%20name")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 400
+    assert response.json() == {"message": "Invalid username"}
+    assert calls == []
+
+
+def test_calendar_is_null_only_when_not_requested():
+    calls: list = []
+    users = {"alice": make_user(), "idle": make_user(submissionCalendar="{}")}
+    service = make_service(graphql_handler(users, calls))
+
+    async def run():
+        return await asyncio.gather(
+            service.get_stats("alice", calendar=False),
+            service.get_stats("alice", calendar=True),
+            service.get_stats("idle", calendar=True),
+        )
+
+    omitted, included, idle = (orjson.loads(stats) for stats in asyncio.run(run()))
+
+    assert omitted["submission_calendar"] is None
+    assert included["submission_calendar"] == {"1700000000": 3}
+    assert idle["submission_calendar"] == {}
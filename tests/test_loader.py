@@ -0,0 +1,56 @@
+import asyncio
+from typing import List
+
+from app.loader import BatchLoader
+
+
+def make_loader(batches: List[List[int]], **kwargs) -> BatchLoader[int, int]:
+    async def batch_load(keys: List[int]) -> List[int]:
+        batches.append(keys)
+        return [key * 10 for key in keys]
+
+    return BatchLoader(batch_load, **kwargs)
+
+
+def test_dispatches_when_batch_is_full():
+    batches: List[List[int]] = []
+
+    async def run():
+        loader = make_loader(batches, max_batch_size=2, wait_interval=10)
+        return await asyncio.wait_for(
+            asyncio.gather(*(loader.load(key) for key in range(4))), timeout=1
+        )
+
+    assert asyncio.run(run()) == [0, 10, 20, 30]
+    assert batches == [[0, 1], [2, 3]]
+
+
+def test_dispatches_after_wait_interval():
+    batches: List[List[int]] = []
+
+    async def run():
+        loader = make_loader(batches, max_batch_size=25, wait_interval=0.05)
+        first = loader.load(1)
+        await asyncio.sleep(0.01)
+        second = loader.load(2)
+        assert await asyncio.gather(first, second) == [10, 20]
+        assert await loader.load(3) == 30
+
+    asyncio.run(run())
+
+    assert batches == [[1, 2], [3]]
+
+
+def test_batch_failure_propagates_to_every_key():
+    async def batch_load(keys: List[int]) -> List[int]:
+        raise RuntimeError("boom")
+
+    async def run():
+        loader: BatchLoader[int, int] = BatchLoader(batch_load, wait_interval=0)
+        return await asyncio.gather(
+            loader.load(1), loader.load(2), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
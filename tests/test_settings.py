@@ -0,0 +1,34 @@
+import pytest
+
+from app.settings import Settings, _env_flag
+
+
+def test_cors_origin_list_strips_whitespace():
+    settings = Settings(cors_origins="https://a.com, https://b.com ,,")
+
+    assert settings.cors_origin_list == ["https://a.com", "https://b.com"]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("1", True), ("true", True), ("On", True), ("0", False), ("false", False)],
+)
+def test_load_dotenv_flag_is_parsed_as_boolean(monkeypatch, value, expected):
+    monkeypatch.setenv("LOAD_DOTENV", value)
+
+    assert _env_flag("LOAD_DOTENV") is expected
+
+
+def test_load_dotenv_flag_defaults_to_off(monkeypatch):
+    monkeypatch.delenv("LOAD_DOTENV", raising=False)
+
+    assert _env_flag("LOAD_DOTENV") is False
+
+
+def test_dotenv_with_unrelated_keys_is_accepted(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("DATABASE_URL=sqlite://\nSOME_OTHER_KEY=1\n")
+
+    settings = Settings(_env_file=env_file)
+
+    assert settings.database_url == "sqlite://"